@@ -4,11 +4,15 @@ from flask import Flask, request, send_file, jsonify
 from flask_cors import CORS
 import geopandas as gpd
 import networkx as nx
-from shapely.geometry import Point, LineString
+import numpy as np
+from scipy.spatial import cKDTree
+from rapidfuzz import process, fuzz, utils
+import shapely
+from shapely.geometry import Point
 import matplotlib.pyplot as plt
 import io
+import functools
 import os
-import difflib
 import math
 
 app = Flask(__name__)
@@ -22,6 +26,8 @@ GEOJSON_PATHS = {
     "Level_2": "geojsons/first_floor.geojson",
     "Level_3": "geojsons/second_floor.geojson",
 }
+STAIR_WEIGHT = 1.0       # cost of moving one floor up/down a staircase
+SNAP_DECIMALS = 6        # graph node coordinates are rounded to this precision
 
 # --- SAFE LOAD GEOJSONS ---
 floor_gdfs = {}
@@ -45,83 +51,117 @@ for lvl, path in GEOJSON_PATHS.items():
         floor_gdfs[lvl] = gpd.GeoDataFrame()
 
 # --- HELPERS ---
+def snap(coords):
+    # coincident corridor vertices differing only in the last bits become one node
+    return np.round(coords, SNAP_DECIMALS)
+
 def build_floor_graph(gdf):
     if gdf.empty or ROOM_TYPE not in gdf.columns:
         return nx.Graph()
     corridors = gdf[gdf[ROOM_TYPE].astype(str).str.contains("corridor", case=False, na=False)]
     G = nx.Graph()
+    segs_p1, segs_p2 = [], []
     for geom in corridors.geometry:
         if geom is None or geom.is_empty:
             continue
         boundary = geom.boundary
         lines = [boundary] if boundary.geom_type == "LineString" else list(boundary.geoms)
         for line in lines:
-            coords = list(line.coords)
-            for i in range(len(coords)-1):
-                p1 = Point(coords[i])
-                p2 = Point(coords[i+1])
-                G.add_edge((p1.x, p1.y), (p2.x, p2.y), weight=p1.distance(p2))
+            c = np.asarray(line.coords, dtype=np.float64)
+            if len(c) < 2:
+                continue
+            segs_p1.append(c[:-1, :2])
+            segs_p2.append(c[1:, :2])
+    if not segs_p1:
+        return G
+    # all segment endpoints and lengths in one go, then a single bulk insert
+    p1 = snap(np.vstack(segs_p1))
+    p2 = snap(np.vstack(segs_p2))
+    keep = (p1 != p2).any(axis=1)
+    p1, p2 = p1[keep], p2[keep]
+    w = np.hypot(*(p2 - p1).T)
+    G.add_weighted_edges_from(zip(map(tuple, p1.tolist()), map(tuple, p2.tolist()), w.tolist()))
     return G
 
-def connect_to_corridor(point, G):
-    if G is None or len(G.nodes) == 0:
+def build_node_index(lvl, G):
+    # KD-tree over the floor's node coordinates for nearest-node queries
+    nodes = list(G.nodes)
+    if not nodes:
+        floor_kdtrees[lvl] = None
+        floor_node_index[lvl] = []
+        return
+    nodes_arr = np.asarray(nodes, dtype=np.float64)
+    floor_kdtrees[lvl] = cKDTree(nodes_arr)
+    floor_node_index[lvl] = nodes
+
+def centroid_xy(gdf):
+    # vectorized centroids; NaN for missing/empty geometries
+    cent = shapely.centroid(gdf.geometry.to_numpy())
+    return shapely.get_x(cent), shapely.get_y(cent)
+
+def stair_rows(gdf):
+    # (name, name[:2], name[-2:], cx, cy) per staircase, name lower-cased
+    if gdf.empty:
+        return []
+    stairs = gdf[gdf[ROOM_TYPE].astype(str).str.contains("staircase", case=False, na=False)]
+    names = stairs[ROOM_NAME].astype(str).str.strip().str.lower().to_numpy()
+    xs, ys = snap(centroid_xy(stairs))
+    return [(n, n[:2], n[-2:], float(x), float(y))
+            for n, x, y in zip(names, xs, ys) if not math.isnan(x)]
+
+def connect_to_corridor(point, lvl):
+    tree = floor_kdtrees.get(lvl)
+    if tree is None:
         return None
-    nearest = None
-    min_d = float("inf")
-    pt = Point(point) if not isinstance(point, Point) else point
-    for node in G.nodes:
-        try:
-            node_pt = Point(node)
-            d = pt.distance(node_pt)
-        except Exception:
-            continue
-        if d < min_d:
-            min_d = d
-            nearest = node
-    return nearest
+    if isinstance(point, Point):
+        px, py = point.x, point.y
+    else:
+        px, py = point
+    _, idx = tree.query([px, py], k=1)
+    return floor_node_index[lvl][idx]
 
 def nearest_pair_list(list_a, list_b):
     pairs = []
-    used_b = set()
-    for a in list_a:
-        best_b = None
-        best_d = float("inf")
-        pa = Point(a)
-        for b in list_b:
-            if b in used_b:
-                continue
-            d = pa.distance(Point(b))
-            if d < best_d:
-                best_d = d
-                best_b = b
-        if best_b is not None:
-            pairs.append((a, best_b))
-            used_b.add(best_b)
+    if len(list_a) == 0 or len(list_b) == 0:
+        return pairs
+    a_arr = np.asarray(list_a, dtype=np.float64)
+    b_arr = np.asarray(list_b, dtype=np.float64)
+    # full pairwise distance matrix, then greedy assignment row by row;
+    # `free` marks the list_b entries not yet taken
+    d = np.hypot(a_arr[:, None, 0] - b_arr[None, :, 0], a_arr[:, None, 1] - b_arr[None, :, 1])
+    free = np.ones(len(list_b), dtype=bool)
+    for i, a in enumerate(list_a):
+        if not free.any():
+            break
+        row = np.where(free, d[i], np.inf)
+        j = row.argmin()
+        pairs.append((a, list_b[j]))
+        free[j] = False
     return pairs
 
 # --- BUILD FLOOR GRAPHS & STAIRS ---
 floor_graphs = {}
 floor_stairs = {}
+stair_table = {}
+floor_kdtrees = {}
+floor_node_index = {}
 for lvl, gdf in floor_gdfs.items():
     G = build_floor_graph(gdf)
     floor_graphs[lvl] = G
+    build_node_index(lvl, G)
 
     # Add staircase centroids
+    stair_table[lvl] = stair_rows(gdf)
     stair_nodes = []
-    if not gdf.empty:
-        stairs = gdf[gdf[ROOM_TYPE].astype(str).str.contains("staircase", case=False, na=False)]
-        for _, row in stairs.iterrows():
-            geom = row.geometry
-            if geom is None or geom.is_empty:
-                continue
-            c = geom.centroid
-            if c is None or c.is_empty:
-                continue
-            nearest = connect_to_corridor(c, G)
-            if nearest:
-                G.add_edge((float(c.x), float(c.y)), nearest, weight=0.5)
-            stair_nodes.append((float(c.x), float(c.y)))
+    for _, _, _, cx, cy in stair_table[lvl]:
+        c = (cx, cy)
+        nearest = connect_to_corridor(c, lvl)
+        if nearest:
+            G.add_edge(c, nearest, weight=0.5)
+        stair_nodes.append(c)
     floor_stairs[lvl] = stair_nodes
+    # re-index so room lookups also see the staircase nodes
+    build_node_index(lvl, G)
 
 # --- SMART STAIR CONNECTIONS ---
 # Match staircases by their name (SG01 <-> S201 etc.)
@@ -130,129 +170,157 @@ def get_stair_pairs():
     levels = sorted(floor_gdfs.keys())
     for i in range(len(levels)-1):
         a, b = levels[i], levels[i+1]
-        gdf_a, gdf_b = floor_gdfs[a], floor_gdfs[b]
-        stairs_a = gdf_a[gdf_a[ROOM_TYPE].astype(str).str.contains("staircase", case=False, na=False)]
-        stairs_b = gdf_b[gdf_b[ROOM_TYPE].astype(str).str.contains("staircase", case=False, na=False)]
-
-        for _, row_a in stairs_a.iterrows():
-            name_a = str(row_a.get(ROOM_NAME, "")).strip().lower()
-            geom_a = row_a.geometry
-            if geom_a is None or geom_a.is_empty:
+        cents_b = [(cx, cy) for _, _, _, cx, cy in stair_table[b]]
+
+        # bucket level-b stairs by ID prefix/suffix (SG01 <-> S201 etc.)
+        by_prefix, by_suffix = {}, {}
+        for j, (_, prefix, suffix, _, _) in enumerate(stair_table[b]):
+            by_prefix.setdefault(prefix, []).append(j)
+            by_suffix.setdefault(suffix, []).append(j)
+
+        # one STRtree per distinct candidate group, built on first use
+        trees = {}
+        for _, prefix, suffix, cx, cy in stair_table[a]:
+            cent_a = (cx, cy)
+            key = (prefix, suffix)
+            if key not in trees:
+                cand = sorted(set(by_prefix.get(key[0], [])) | set(by_suffix.get(key[1], [])))
+                tree = shapely.STRtree(shapely.points([cents_b[j] for j in cand])) if cand else None
+                trees[key] = (cand, tree)
+            cand, tree = trees[key]
+            if tree is None:
                 continue
-            cent_a = (float(geom_a.centroid.x), float(geom_a.centroid.y))
-
-            best_match = None
-            min_dist = float("inf")
-            for _, row_b in stairs_b.iterrows():
-                name_b = str(row_b.get(ROOM_NAME, "")).strip().lower()
-                geom_b = row_b.geometry
-                if geom_b is None or geom_b.is_empty:
-                    continue
-                cent_b = (float(geom_b.centroid.x), float(geom_b.centroid.y))
-
-                # match by similar ID (SG01 <-> S201 etc.)
-                if name_a[:2] == name_b[:2] or name_a[-2:] == name_b[-2:]:
-                    d = Point(cent_a).distance(Point(cent_b))
-                    if d < min_dist:
-                        min_dist = d
-                        best_match = cent_b
-
-            if best_match:
-                pairs.append(((a, cent_a), (b, best_match)))
+            # ties resolve to the first candidate, as in a linear scan
+            idx = tree.query_nearest(Point(cent_a))
+            best_match = cents_b[cand[idx.min()]]
+            pairs.append(((a, cent_a), (b, best_match)))
     return pairs
 
 # --- MERGE GRAPH ---
 G_all = nx.Graph()
-for lvl, G in floor_graphs.items():
-    for node in G.nodes:
-        G_all.add_node((lvl, node))
-    for u, v, data in G.edges(data=True):
-        G_all.add_edge((lvl, u), (lvl, v), weight=data.get("weight", 1.0))
+G_all.add_nodes_from((lvl, node) for lvl, G in floor_graphs.items() for node in G.nodes)
+G_all.add_weighted_edges_from(
+    ((lvl, u), (lvl, v), w)
+    for lvl, G in floor_graphs.items()
+    for u, v, w in G.edges(data="weight", default=1.0)
+)
 
 # --- Connect staircases between floors based on IDs ---
 stair_pairs = get_stair_pairs()
-for (a, sa), (b, sb) in stair_pairs:
-    G_all.add_edge((a, sa), (b, sb), weight=1.0)
+G_all.add_weighted_edges_from(((a, sa), (b, sb), STAIR_WEIGHT) for (a, sa), (b, sb) in stair_pairs)
 
-# --- ROOMS LIST ---
-all_rooms = []
+# --- ROOMS TABLE ---
+# One column array per room attribute; row i describes the same room in each.
+floors, types, names, xs, ys = [], [], [], [], []
 for lvl, gdf in floor_gdfs.items():
     if gdf.empty:
         continue
-    for _, row in gdf.iterrows():
-        geom = row.geometry
-        if geom is None or geom.is_empty:
-            continue
-        centroid = geom.centroid
-        if centroid is None or centroid.is_empty:
-            continue
-        rtype = str(row.get(ROOM_TYPE, "")).strip()
-        rname = str(row.get(ROOM_NAME, "")).strip()
-        all_rooms.append({
-            "floor": lvl,
-            "room_type": rtype,
-            "room_name": rname,
-            "coords": (float(centroid.x), float(centroid.y))
-        })
-
-room_name_list = [r["room_name"] for r in all_rooms if r["room_name"]]
-room_type_list = [r["room_type"] for r in all_rooms if r["room_type"]]
+    x, y = centroid_xy(gdf)
+    keep = ~np.isnan(x)
+    floors.extend([lvl] * int(keep.sum()))
+    types.extend(gdf[ROOM_TYPE].astype(str).str.strip().to_numpy()[keep])
+    names.extend(gdf[ROOM_NAME].astype(str).str.strip().to_numpy()[keep])
+    xs.extend(x[keep])
+    ys.extend(y[keep])
+
+rooms_floor = np.array(floors, dtype=str)
+rooms_type = np.array(types, dtype=str)
+rooms_name = np.array(names, dtype=str)
+rooms_coords = np.column_stack([xs, ys]).astype(np.float64)
+rooms_type_lower = np.char.lower(rooms_type)
+rooms_name_lower = np.char.lower(rooms_name)
+
+room_name_list = [n for n in rooms_name.tolist() if n]
+room_type_list = [t for t in rooms_type.tolist() if t]
 match_candidates = sorted(list(set(room_name_list + room_type_list)))
+# lower-cased/stripped once here instead of on every fuzzy lookup
+match_candidates_pre = [utils.default_process(c) for c in match_candidates]
 
 # --- MATCHING FUNCTIONS ---
+# deletes every non-alphanumeric ASCII character
+_NON_ALNUM = str.maketrans("", "", "".join(chr(i) for i in range(128) if not chr(i).isalnum()))
+
 def canonical(s):
     if s is None:
-        return ""
+        return "", ""
     s2 = str(s).strip().lower()
-    s_alnum = "".join(ch for ch in s2 if ch.isalnum())
+    if s2.isascii():
+        s_alnum = s2.translate(_NON_ALNUM)
+    else:
+        s_alnum = "".join(ch for ch in s2 if ch.isalnum())
     return s2, s_alnum
 
+rooms_name_alnum = np.array([canonical(n)[1] for n in rooms_name.tolist()], dtype=str)
+
+# --- MATCH INDEXES (built once at load) ---
+# key -> first room row with that key
+room_name_index = {}
+room_type_index = {}
+room_alnum_index = {}
+room_keys = zip(rooms_name_lower.tolist(), rooms_type_lower.tolist(), rooms_name_alnum.tolist())
+for i, (rn, rt, rn_alnum) in enumerate(room_keys):
+    if rn:
+        room_name_index.setdefault(rn, i)
+    if rt:
+        room_type_index.setdefault(rt, i)
+    if rn_alnum:
+        room_alnum_index.setdefault(rn_alnum, i)
+
+def room_location(i):
+    floor = str(rooms_floor[i])
+    centroid = Point(rooms_coords[i])
+    node = connect_to_corridor(centroid, floor)
+    return (floor, node), centroid
+
 def find_best_match(input_str):
     if not input_str:
         return None, None, []
+    return _find_best_match_cached(str(input_str).strip().lower())
 
+# rooms are static, so a normalized query always resolves the same way
+@functools.lru_cache(maxsize=4096)
+def _find_best_match_cached(input_str):
     q_raw, q_alnum = canonical(input_str)
 
-    for r in all_rooms:
-        if r["room_name"].strip().lower() == q_raw:
-            floor = r["floor"]
-            centroid = Point(r["coords"])
-            node = connect_to_corridor(centroid, floor_graphs[floor])
-            return (floor, node), centroid, [r["room_name"]]
-
-    for r in all_rooms:
-        if r["room_type"].strip().lower() == q_raw:
-            floor = r["floor"]
-            centroid = Point(r["coords"])
-            node = connect_to_corridor(centroid, floor_graphs[floor])
-            return (floor, node), centroid, [r["room_type"]]
-
-    substr_matches = []
-    for r in all_rooms:
-        rn = r["room_name"].strip().lower()
-        if q_raw and q_raw in rn:
-            substr_matches.append(r)
-    if substr_matches:
-        r = substr_matches[0]
-        node = connect_to_corridor(Point(r["coords"]), floor_graphs[r["floor"]])
-        return (r["floor"], node), Point(r["coords"]), [x["room_name"] for x in substr_matches[:10]]
-
-    if q_alnum:
-        for r in all_rooms:
-            rn_alnum = "".join(ch for ch in r["room_name"].strip().lower() if ch.isalnum())
-            if rn_alnum and rn_alnum == q_alnum:
-                node = connect_to_corridor(Point(r["coords"]), floor_graphs[r["floor"]])
-                return (r["floor"], node), Point(r["coords"]), [r["room_name"]]
-
-    for r in all_rooms:
-        rt = r["room_type"].strip().lower()
-        if q_raw and q_raw in rt:
-            node = connect_to_corridor(Point(r["coords"]), floor_graphs[r["floor"]])
-            return (r["floor"], node), Point(r["coords"]), [r["room_type"]]
-
-    close = difflib.get_close_matches(input_str, match_candidates, n=5, cutoff=0.6)
+    i = room_name_index.get(q_raw)
+    if i is not None:
+        return (*room_location(i), [str(rooms_name[i])])
+
+    i = room_type_index.get(q_raw)
+    if i is not None:
+        return (*room_location(i), [str(rooms_type[i])])
+
+    if q_raw:
+        hits = np.flatnonzero(np.char.find(rooms_name_lower, q_raw) >= 0)
+        if hits.size:
+            return (*room_location(hits[0]), rooms_name[hits[:10]].tolist())
+
+    i = room_alnum_index.get(q_alnum) if q_alnum else None
+    if i is not None:
+        return (*room_location(i), [str(rooms_name[i])])
+
+    if q_raw:
+        hits = np.flatnonzero(np.char.find(rooms_type_lower, q_raw) >= 0)
+        if hits.size:
+            return (*room_location(hits[0]), [str(rooms_type[hits[0]])])
+
+    hits = process.extract(utils.default_process(input_str), match_candidates_pre,
+                           scorer=fuzz.ratio, processor=None, limit=5, score_cutoff=60)
+    close = [match_candidates[j] for _, _, j in hits]
     return None, None, close
 
+# --- EMERGENCY EXITS ---
+# Shortest path from every node to its nearest exit, computed once
+exit_centroids = {}
+is_exit = (np.char.find(rooms_type_lower, "exit") >= 0) | (np.char.find(rooms_name_lower, "exit") >= 0)
+for i in np.flatnonzero(is_exit):
+    (floor, enode), centroid = room_location(i)
+    if enode:
+        exit_centroids.setdefault((floor, enode), (centroid.x, centroid.y))
+exit_dist, exit_paths = {}, {}
+if exit_centroids:
+    exit_dist, exit_paths = nx.multi_source_dijkstra(G_all, set(exit_centroids), weight="weight")
+
 # --- ROUTES ---
 @app.route("/")
 def home():
@@ -260,14 +328,14 @@ def home():
 
 @app.route("/debug_rooms")
 def debug_rooms():
-    return jsonify({"count": len(all_rooms),
+    return jsonify({"count": len(rooms_name),
                     "room_names": room_name_list[:200],
                     "room_types": list(set(room_type_list))[:200],
                     "candidates_sample": match_candidates[:200]})
 
 @app.route("/get_rooms")
 def get_rooms():
-    types = sorted(list({r["room_type"] for r in all_rooms if r["room_type"]}))
+    types = sorted(set(room_type_list))
     return jsonify(types)
 
 @app.route("/get_path", methods=["POST"])
@@ -284,27 +352,11 @@ def get_path():
         }), 400
 
     if isinstance(end_in, str) and end_in.strip() == "Exit":
-        end_node, end_centroid = None, None
-        exit_rooms = [r for r in all_rooms if "exit" in r["room_type"].lower() or "exit" in r["room_name"].lower()]
-        best = None
-        best_len = float("inf")
-        best_cent = None
-        for r in exit_rooms:
-            enode = connect_to_corridor(Point(r["coords"]), floor_graphs[r["floor"]])
-            if not enode:
-                continue
-            try:
-                path = nx.astar_path(G_all, start_node, (r["floor"], enode), weight="weight")
-                length = sum(Point(u[1]).distance(Point(v[1])) for u, v in zip(path, path[1:]))
-                if length < best_len:
-                    best_len = length
-                    best = (r["floor"], enode)
-                    best_cent = Point(r["coords"])
-            except Exception:
-                continue
-        if not best:
+        if start_node not in exit_dist:
             return jsonify({"error": "No reachable emergency exit"}), 400
-        end_node, end_centroid = best, best_cent
+        path_nodes = list(reversed(exit_paths[start_node]))
+        end_node = path_nodes[-1]
+        end_centroid = Point(exit_centroids[end_node])
     else:
         end_node, end_centroid, end_candidates = find_best_match(end_in)
         if not end_node:
@@ -313,11 +365,79 @@ def get_path():
                 "candidates": end_candidates
             }), 400
 
-    try:
-        path_nodes = nx.astar_path(G_all, start_node, end_node, weight="weight")
-    except nx.NetworkXNoPath:
-        return jsonify({"error": "No path between given nodes"}), 400
+        try:
+            _, path_nodes = nx.bidirectional_dijkstra(G_all, start_node, end_node, weight="weight")
+        except nx.NetworkXNoPath:
+            return jsonify({"error": "No path between given nodes"}), 400
+
+    start_xy = (start_centroid.x, start_centroid.y)
+    end_xy = (end_centroid.x, end_centroid.y)
+    png = render_path_png(tuple(path_nodes), start_node, start_xy, end_node, end_xy)
+    return send_file(io.BytesIO(png), mimetype="image/png")
+
+# --- RENDERING ---
+# Floor plans, room labels and stairs never change between requests, so
+# each floor is drawn once at load and reused as an image underlay.
+# Size/dpi roughly match one output panel so labels keep their size.
+BG_WIDTH_IN = 6
+BG_DPI = 100
+
+def render_floor_background(lvl, gdf):
+    minx, miny, maxx, maxy = gdf.total_bounds
+    pad_x = (maxx - minx) * 0.05 or 1.0
+    pad_y = (maxy - miny) * 0.05 or 1.0
+    extent = (minx - pad_x, maxx + pad_x, miny - pad_y, maxy + pad_y)
+
+    fig = plt.figure(dpi=BG_DPI)
+    ax = fig.add_axes([0, 0, 1, 1])
+    gdf.plot(ax=ax, color="lightgrey", edgecolor="black")
+    # geopandas picks the aspect (e.g. latitude-corrected for EPSG:4326);
+    # size the image to match so the underlay isn't stretched
+    aspect = ax.get_aspect()
+    if aspect == "auto":
+        aspect = 1.0
+    width = extent[1] - extent[0]
+    height = (extent[3] - extent[2]) * aspect
+    fig.set_size_inches(BG_WIDTH_IN, BG_WIDTH_IN * height / width)
+
+    # --- DISPLAY ROOM NUMBERS ON POLYGONS ---
+    xs, ys = centroid_xy(gdf)
+    labels = gdf[ROOM_NAME].astype(str).str.strip().to_numpy()
+    for x, y, room_no in zip(xs, ys, labels):
+        if room_no and not math.isnan(x):
+            ax.text(
+                x, y, room_no,
+                fontsize=7,
+                ha="center", va="center",
+                color="black", weight="bold",
+                bbox=dict(facecolor="white", alpha=0.6, edgecolor="none", pad=0.5),
+                zorder=6
+            )
+
+    # draw stairs
+    stairs = floor_stairs.get(lvl, [])
+    if stairs:
+        sx, sy = zip(*stairs)
+        ax.scatter(sx, sy, s=80, edgecolor="black", facecolor="yellow", zorder=6)
+
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect("auto")
+    ax.axis("off")
+    fig.canvas.draw()
+    img = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return img, extent, aspect
+
+floor_bg_images = {}
+for lvl, gdf in floor_gdfs.items():
+    if not gdf.empty:
+        floor_bg_images[lvl] = render_floor_background(lvl, gdf)
 
+# Path images depend only on the route and its endpoints, so identical
+# queries reuse the PNG bytes instead of re-running matplotlib.
+@functools.lru_cache(maxsize=512)
+def render_path_png(path_nodes, start_node, start_xy, end_node, end_xy):
     floor_paths = {}
     for f, node in path_nodes:
         floor_paths.setdefault(f, []).append(node)
@@ -331,41 +451,20 @@ def get_path():
             ax.set_title(f"{floor} (no data)")
             continue
 
-        gdf.plot(ax=ax, color="lightgrey", edgecolor="black")
-
-        # --- DISPLAY ROOM NUMBERS ON POLYGONS ---
-        for _, row in gdf.iterrows():
-            geom = row.geometry
-            if geom is None or geom.is_empty:
-                continue
-            c = geom.centroid
-            if c is None or c.is_empty:
-                continue
-            room_no = str(row.get(ROOM_NAME, "")).strip()
-            if room_no:
-                ax.text(
-                    c.x, c.y, room_no,
-                    fontsize=7,
-                    ha="center", va="center",
-                    color="black", weight="bold",
-                    bbox=dict(facecolor="white", alpha=0.6, edgecolor="none", pad=0.5),
-                    zorder=6
-                )
+        bg = floor_bg_images.get(floor)
+        if bg is not None:
+            img, extent, aspect = bg
+            ax.imshow(img, extent=extent, aspect=aspect, zorder=0)
 
         # draw path
-        for i in range(len(nodes) - 1):
-            seg = LineString([nodes[i], nodes[i+1]])
-            ax.plot(*seg.xy, linewidth=2, linestyle="--", color="blue", zorder=5)
-
-        # draw stairs
-        for sx, sy in floor_stairs.get(floor, []):
-            ax.scatter(sx, sy, s=80, edgecolor="black", facecolor="yellow", zorder=6)
+        xs, ys = zip(*nodes)
+        ax.plot(xs, ys, linewidth=2, linestyle="--", color="blue", zorder=5)
 
         # start and end
         if floor == start_node[0]:
-            ax.scatter(start_centroid.x, start_centroid.y, s=100, color="green", zorder=8)
+            ax.scatter(*start_xy, s=100, color="green", zorder=8)
         if floor == end_node[0]:
-            ax.scatter(end_centroid.x, end_centroid.y, s=100, color="blue", zorder=8)
+            ax.scatter(*end_xy, s=100, color="blue", zorder=8)
 
         ax.set_title(f"Path on {floor}")
         ax.axis("off")
@@ -373,9 +472,8 @@ def get_path():
     buf = io.BytesIO()
     plt.tight_layout()
     plt.savefig(buf, format="png")
-    buf.seek(0)
     plt.close(fig)
-    return send_file(buf, mimetype="image/png")
+    return buf.getvalue()
 
 if __name__ == "__main__":
     app.run(debug=True, use_reloader=False)